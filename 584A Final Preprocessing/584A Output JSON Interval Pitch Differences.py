@@ -3,6 +3,7 @@ import json
 import pretty_midi
 from collections import Counter
 import warnings
+from corpus_profiler import CorpusProfiler, NULL_PROFILER
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
@@ -39,17 +40,23 @@ def extract_pitch_intervals(notes):
 
 # === Process One MIDI File ===
 
-def process_midi_file(midi_path):
-    try:
-        pm = pretty_midi.PrettyMIDI(midi_path)
-    except Exception as e:
-        return None, f" Failed to process {midi_path}: {e}"
+def process_midi_file(midi_path, profiler=NULL_PROFILER, pm=None):
+    # pm: an already parsed PrettyMIDI for midi_path, if the caller has one
+    if pm is None:
+        try:
+            with profiler.stage("parse"):
+                pm = pretty_midi.PrettyMIDI(midi_path)
+        except Exception as e:
+            return None, f" Failed to process {midi_path}: {e}"
 
     track_results = []
 
     for idx, instrument in enumerate(pm.instruments):
-        notes = sorted(instrument.notes, key=lambda n: n.start)
-        if not notes or should_exclude_track(notes):
+        profiler.add_notes(len(instrument.notes))
+        with profiler.stage("filter"):
+            notes = sorted(instrument.notes, key=lambda n: n.start)
+            excluded = not notes or should_exclude_track(notes)
+        if excluded:
             continue
 
         intervals = extract_pitch_intervals(notes)
@@ -73,7 +80,7 @@ def process_midi_file(midi_path):
 
 # === Traverse Directory and Save Only Interval JSONs ===
 
-def process_all_midis(base_dir, output_dir):
+def process_all_midis(base_dir, output_dir, profiler=NULL_PROFILER, profile_report=None):
     os.makedirs(output_dir, exist_ok=True)
 
     for artist in os.listdir(base_dir):
@@ -89,23 +96,31 @@ def process_all_midis(base_dir, output_dir):
                 continue
 
             file_path = os.path.join(artist_path, file)
-            data, error = process_midi_file(file_path)
+            with profiler.file(file_path):
+                data, error = process_midi_file(file_path, profiler=profiler)
 
-            if data is None:
-                print(error)
-                continue
+                if data is None:
+                    profiler.mark_failed()
+                    print(error)
+                    continue
 
-            song_name = os.path.splitext(file)[0]
-            output_path = os.path.join(artist_output_path, f"{song_name}.json")
-            with open(output_path, "w") as f:
-                json.dump(data, f, indent=2)
+                song_name = os.path.splitext(file)[0]
+                output_path = os.path.join(artist_output_path, f"{song_name}.json")
+                with profiler.stage("write"):
+                    with open(output_path, "w") as f:
+                        json.dump(data, f, indent=2)
 
     print(f"\n All MIDI files processed and saved to: {output_dir}")
+    profiler.finish(profile_report)
 
 # === Run Script ===
 
+PROFILE = False  # True writes a per-stage timing report for the run
+
 if __name__ == "__main__":
     process_all_midis(
         base_dir=r"C:\Users\Ben Dizdar\Downloads\clean_midi\clean_midi_deduplicated_and_bytes",
-        output_dir=r"Z:\clean_midi_deduplicated_and_bytes_intervals_only"
+        output_dir=r"Z:\clean_midi_deduplicated_and_bytes_intervals_only",
+        profiler=CorpusProfiler(report_every=500, top_n=25, track_memory=True) if PROFILE else NULL_PROFILER,
+        profile_report="interval_profile.txt" if PROFILE else None,
     )
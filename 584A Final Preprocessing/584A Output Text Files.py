@@ -3,6 +3,7 @@ import json
 import pretty_midi
 from collections import Counter
 import warnings
+from corpus_profiler import CorpusProfiler, NULL_PROFILER
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
@@ -117,42 +118,48 @@ def chroma_encode(pitches):
 
 # === Process One MIDI File ===
 
-def process_midi_file(midi_path):
+def process_midi_file(midi_path, profiler=NULL_PROFILER):
     try:
-        pm = pretty_midi.PrettyMIDI(midi_path)
+        with profiler.stage("parse"):
+            pm = pretty_midi.PrettyMIDI(midi_path)
     except Exception as e:
         return None, f"Failed to process {midi_path}: {e}"
 
     final_data = []
 
     for instrument in pm.instruments:
-        notes = sorted(instrument.notes, key=lambda n: n.start)
-        if not notes or should_exclude_track(notes):
+        profiler.add_notes(len(instrument.notes))
+        with profiler.stage("filter"):
+            notes = sorted(instrument.notes, key=lambda n: n.start)
+            excluded = not notes or should_exclude_track(notes)
+        if excluded:
             continue
 
         chroma_dur_seq = [[note.pitch % 12 + 1, round(note.end - note.start, 4)] for note in notes]
         chroma_seq = [c for c, d in chroma_dur_seq]
 
-        sa = build_suffix_array(chroma_seq)
-        lcp = build_lcp(chroma_seq, sa)
-        repeats = collect_supermaximal_repeats(chroma_seq, sa, lcp)
+        with profiler.stage("repeats"):
+            sa = build_suffix_array(chroma_seq)
+            lcp = build_lcp(chroma_seq, sa)
+            repeats = collect_supermaximal_repeats(chroma_seq, sa, lcp)
 
         final_data.append(chroma_dur_seq)
 
-        for r in sorted(repeats, key=len, reverse=True):
-            positions = []
-            for i in range(len(chroma_seq) - len(r) + 1):
-                if tuple(chroma_seq[i:i + len(r)]) == r:
-                    positions.append(i)
-            for idx in positions:
-                repeat_slice = chroma_dur_seq[idx:idx + len(r)]
-                final_data.append(repeat_slice)
+        with profiler.stage("locate"):
+            for r in sorted(repeats, key=len, reverse=True):
+                positions = []
+                for i in range(len(chroma_seq) - len(r) + 1):
+                    if tuple(chroma_seq[i:i + len(r)]) == r:
+                        positions.append(i)
+                for idx in positions:
+                    repeat_slice = chroma_dur_seq[idx:idx + len(r)]
+                    final_data.append(repeat_slice)
 
     return final_data, None
 
 # === Traverse Directory and Save Output ===
 
-def process_all_midis(base_dir, output_dir):
+def process_all_midis(base_dir, output_dir, profiler=NULL_PROFILER, profile_report=None):
     os.makedirs(output_dir, exist_ok=True)
     for artist in os.listdir(base_dir):
         artist_path = os.path.join(base_dir, artist)
@@ -167,22 +174,30 @@ def process_all_midis(base_dir, output_dir):
                 continue
 
             file_path = os.path.join(artist_path, file)
-            data, error = process_midi_file(file_path)
+            with profiler.file(file_path):
+                data, error = process_midi_file(file_path, profiler=profiler)
 
-            if data is None:
-                print(error)
-                continue
+                if data is None:
+                    profiler.mark_failed()
+                    print(error)
+                    continue
 
-            song_name = os.path.splitext(file)[0]
-            output_path = os.path.join(artist_output_path, f"{song_name}.json")
-            with open(output_path, "w") as f:
-                json.dump(data, f, indent=2)
+                song_name = os.path.splitext(file)[0]
+                output_path = os.path.join(artist_output_path, f"{song_name}.json")
+                with profiler.stage("write"):
+                    with open(output_path, "w") as f:
+                        json.dump(data, f, indent=2)
 
     print(f"\n All MIDI files processed and saved to: {output_dir}")
+    profiler.finish(profile_report)
 
 # === Run ===
 
+PROFILE = False  # True writes a per-stage timing report for the run
+
 process_all_midis(
     base_dir=r"C:\Users\Ben Dizdar\Downloads\clean_midi\clean_midi_deduplicated_and_bytes",
-    output_dir=r"Z:\clean_midi_deduplicated_and_bytes_text"
+    output_dir=r"Z:\clean_midi_deduplicated_and_bytes_text",
+    profiler=CorpusProfiler(report_every=100, top_n=25, track_memory=True) if PROFILE else NULL_PROFILER,
+    profile_report="repeats_profile.txt" if PROFILE else None,
 )
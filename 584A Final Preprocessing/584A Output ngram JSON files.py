@@ -3,6 +3,7 @@ import json
 import pretty_midi
 from collections import Counter
 import warnings
+from corpus_profiler import CorpusProfiler, NULL_PROFILER
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
@@ -120,22 +121,27 @@ def chroma_encode(pitches):
 
 # === Main MIDI File Processor ===
 
-def process_midi_file(midi_path, ngram_n=3):
+def process_midi_file(midi_path, ngram_n=3, profiler=NULL_PROFILER):
     try:
-        pm = pretty_midi.PrettyMIDI(midi_path)
+        with profiler.stage("parse"):
+            pm = pretty_midi.PrettyMIDI(midi_path)
     except Exception as e:
         return None, f" Failed to process {midi_path}: {e}"
 
     track_results = []
 
     for instrument in pm.instruments:
-        notes = sorted(instrument.notes, key=lambda n: n.start)
-        if not notes or should_exclude_track(notes):
+        profiler.add_notes(len(instrument.notes))
+        with profiler.stage("filter"):
+            notes = sorted(instrument.notes, key=lambda n: n.start)
+            excluded = not notes or should_exclude_track(notes)
+        if excluded:
             continue
 
-        chroma_dur_seq = [[note.pitch % 12 + 1, round(note.end - note.start, 4)] for note in notes]
-        intervals = extract_pitch_intervals(notes)
-        interval_ngrams = get_interval_ngrams(intervals, n=ngram_n)
+        with profiler.stage("encode"):
+            chroma_dur_seq = [[note.pitch % 12 + 1, round(note.end - note.start, 4)] for note in notes]
+            intervals = extract_pitch_intervals(notes)
+            interval_ngrams = get_interval_ngrams(intervals, n=ngram_n)
 
         # --- Optional supermax repeat logic ---
         # chroma_seq = [c for c, d in chroma_dur_seq]
@@ -155,7 +161,7 @@ def process_midi_file(midi_path, ngram_n=3):
 
 # === Traverse Directory and Save JSONs ===
 
-def process_all_midis(base_dir, output_dir, ngram_n=3):
+def process_all_midis(base_dir, output_dir, ngram_n=3, profiler=NULL_PROFILER, profile_report=None):
     os.makedirs(output_dir, exist_ok=True)
     
     for artist in os.listdir(base_dir):
@@ -171,26 +177,34 @@ def process_all_midis(base_dir, output_dir, ngram_n=3):
                 continue
 
             file_path = os.path.join(artist_path, file)
-            data, error = process_midi_file(file_path, ngram_n=ngram_n)
+            with profiler.file(file_path):
+                data, error = process_midi_file(file_path, ngram_n=ngram_n, profiler=profiler)
 
-            if data is None:
-                print(error)
-                continue
+                if data is None:
+                    profiler.mark_failed()
+                    print(error)
+                    continue
 
-            song_name = os.path.splitext(file)[0]
-            output_path = os.path.join(artist_output_path, f"{song_name}.json")
-            with open(output_path, "w") as f:
-                json.dump(data, f, indent=2)
+                song_name = os.path.splitext(file)[0]
+                output_path = os.path.join(artist_output_path, f"{song_name}.json")
+                with profiler.stage("write"):
+                    with open(output_path, "w") as f:
+                        json.dump(data, f, indent=2)
 
     print(f"\n All MIDI files processed and saved to: {output_dir}")
+    profiler.finish(profile_report)
 
 # === Run if script is executed directly ===
 
+PROFILE = False  # True writes a per-stage timing report for the run
+
 if __name__ == "__main__":
     process_all_midis(
         base_dir=r"C:\Users\Ben Dizdar\Downloads\clean_midi\clean_midi_deduplicated_and_bytes",
         output_dir=r"Z:\clean_midi_deduplicated_and_bytes_text_n_gram",
-        ngram_n=6  # Adjustable n-gram size for interval fingerprinting
+        ngram_n=6,  # Adjustable n-gram size for interval fingerprinting
+        profiler=CorpusProfiler(report_every=500, top_n=25) if PROFILE else NULL_PROFILER,
+        profile_report="ngram_profile.txt" if PROFILE else None,
     )
 
 """
@@ -5,6 +5,7 @@ from datetime import datetime
 import pretty_midi
 import difflib
 import re
+from corpus_profiler import CorpusProfiler, NULL_PROFILER
 
 def normalize_filename(name):
     name = name.lower()
@@ -28,7 +29,8 @@ def is_valid_midi_range(midi_data):
                 return False
     return True
 
-def scan_and_copy_midi(base_dir, output_dir, log_file="midi_integrity_log.txt"):
+def scan_and_copy_midi(base_dir, output_dir, log_file="midi_integrity_log.txt",
+                       profiler=NULL_PROFILER, profile_report=None):
     start_time = time.time()
     start_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -53,33 +55,42 @@ def scan_and_copy_midi(base_dir, output_dir, log_file="midi_integrity_log.txt"):
                     continue
 
                 file_path = os.path.join(artist_path, file)
-                normalized_name = normalize_filename(file)
-
-                if is_similar(normalized_name, seen_song_names):
-                    print(f"Duplicate (fuzzy match) skipped: {file_path}")
-                    log.write(f"Duplicate (fuzzy match) skipped: {file_path}\n")
-                    duplicate_count += 1
-                    continue
-
-                try:
-                    midi_data = pretty_midi.PrettyMIDI(file_path)
-
-                    if not is_valid_midi_range(midi_data):
-                        raise ValueError("Data byte out of 0..127 range")
-
-                    seen_song_names.append(normalized_name)
-
-                    dest_file_path = os.path.join(output_artist_path, file)
-                    shutil.copy2(file_path, dest_file_path)
-
-                    print(f"Copied: {file_path}")
-                    log.write(f"{file_path} -> {dest_file_path}\n")
-                    success_count += 1
-
-                except Exception as e:
-                    print(f"Failed: {file_path} | Reason: {type(e).__name__}: {e}")
-                    log.write(f"{file_path} | Reason: {type(e).__name__}: {e}\n")
-                    failure_count += 1
+                with profiler.file(file_path):
+                    with profiler.stage("dedup"):
+                        normalized_name = normalize_filename(file)
+                        duplicate = is_similar(normalized_name, seen_song_names)
+
+                    if duplicate:
+                        print(f"Duplicate (fuzzy match) skipped: {file_path}")
+                        log.write(f"Duplicate (fuzzy match) skipped: {file_path}\n")
+                        duplicate_count += 1
+                        continue
+
+                    try:
+                        with profiler.stage("parse"):
+                            midi_data = pretty_midi.PrettyMIDI(file_path)
+                        profiler.add_notes(sum(len(inst.notes) for inst in midi_data.instruments))
+
+                        with profiler.stage("validate"):
+                            valid = is_valid_midi_range(midi_data)
+                        if not valid:
+                            raise ValueError("Data byte out of 0..127 range")
+
+                        seen_song_names.append(normalized_name)
+
+                        dest_file_path = os.path.join(output_artist_path, file)
+                        with profiler.stage("copy"):
+                            shutil.copy2(file_path, dest_file_path)
+
+                        print(f"Copied: {file_path}")
+                        log.write(f"{file_path} -> {dest_file_path}\n")
+                        success_count += 1
+
+                    except Exception as e:
+                        profiler.mark_failed()
+                        print(f"Failed: {file_path} | Reason: {type(e).__name__}: {e}")
+                        log.write(f"{file_path} | Reason: {type(e).__name__}: {e}\n")
+                        failure_count += 1
 
         end_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         elapsed = time.time() - start_time
@@ -94,9 +105,14 @@ def scan_and_copy_midi(base_dir, output_dir, log_file="midi_integrity_log.txt"):
     print(f"\n Finished at: {end_timestamp}")
     print(f" Total time: {elapsed:.2f} seconds")
     print(f" Log saved to: {log_file}")
+    profiler.finish(profile_report)
+
+PROFILE = False  # True writes a per-stage timing report for the run
 
 if __name__ == "__main__":
     midi_root = r"C:\Users\Ben Dizdar\Downloads\clean_midi\clean_midi"
     output_root = r"C:\Users\Ben Dizdar\Downloads\clean_midi\clean_midi_deduplicated_and_bytes"
-    scan_and_copy_midi(midi_root, output_root)
+    scan_and_copy_midi(midi_root, output_root,
+                       profiler=CorpusProfiler(report_every=500, top_n=25) if PROFILE else NULL_PROFILER,
+                       profile_report="midi_integrity_profile.txt" if PROFILE else None)
 
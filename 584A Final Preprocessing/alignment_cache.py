@@ -0,0 +1,277 @@
+import json
+import time
+import zlib
+import types
+import inspect
+import hashlib
+import sqlite3
+import functools
+import numpy as np
+
+# === Content-addressed cache for pairwise alignment results ===
+#
+# Keys are a hash of the method name, both sequences and the scoring
+# parameters (gap penalty, sigma / distance function, band, ...), so an
+# unchanged pair comes back from disk instead of being recomputed. Arguments
+# left at their defaults are bound before hashing, so changing a default
+# invalidates old entries too.
+#
+# Callables in the parameters are fingerprinted without memory addresses:
+# their bytecode and constants (nested code objects included), default
+# arguments, closure cell contents, and every plain Python function they
+# reach through globals. So a lambda binding music_distance to key 'C' and one
+# binding it to 'G' get different keys, and editing tps_distance invalidates
+# entries computed through music_distance. functools.partial is unwrapped.
+# Anything that can't be fingerprinted this way raises ValueError; pass an
+# explicit dist_id string instead.
+#
+#     cache = AlignmentCache("alignment_cache.sqlite", max_bytes=512 * 2**20)
+#     dist, path = cached_dtw(cache, intervals1, intervals2, dist=DISTANCE_FN, keep_path=True)
+#
+# Entries are evicted least recently used first once the store passes max_bytes.
+
+_SCALARS = (type(None), bool, int, float, str)
+
+
+def _canonical(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, _SCALARS):
+        return value
+    if callable(value):
+        return function_fingerprint(value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items())}
+    raise ValueError(f"Can't build a cache key from {type(value).__name__}; pass an explicit dist_id")
+
+
+def _code_fingerprint(code, digest):
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # repr() of a code object includes its address, so recurse instead
+            _code_fingerprint(const, digest)
+        else:
+            digest.update(repr(const).encode("utf-8"))
+
+
+def _global_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def function_fingerprint(fn, _seen=None):
+    _seen = set() if _seen is None else _seen
+
+    if isinstance(fn, functools.partial):
+        return ["partial", function_fingerprint(fn.func, _seen), _canonical(fn.args), _canonical(fn.keywords)]
+
+    if isinstance(fn, types.BuiltinFunctionType):
+        return f"{fn.__module__}.{fn.__qualname__}"
+
+    code = getattr(fn, "__code__", None)
+    if code is None:
+        raise ValueError(f"Can't fingerprint {fn!r}; pass an explicit dist_id")
+    if id(code) in _seen:
+        return f"recursive:{fn.__qualname__}"
+    _seen.add(id(code))
+
+    digest = hashlib.blake2b(digest_size=16)
+    _code_fingerprint(code, digest)
+
+    bound = {
+        "defaults": fn.__defaults__ or (),
+        "kwdefaults": fn.__kwdefaults__ or {},
+        "closure": [cell.cell_contents for cell in (fn.__closure__ or ())],
+    }
+    for part in bound.values():
+        digest.update(json.dumps(_canonical_in(part, _seen), separators=(",", ":")).encode("utf-8"))
+
+    # Functions reached through globals, e.g. music_distance -> tps_distance
+    fn_globals = getattr(fn, "__globals__", {})
+    for name in sorted(_global_names(code)):
+        target = fn_globals.get(name)
+        if isinstance(target, (types.FunctionType, functools.partial)):
+            digest.update(name.encode("utf-8"))
+            digest.update(json.dumps(function_fingerprint(target, _seen)).encode("utf-8"))
+        elif isinstance(target, _SCALARS):
+            digest.update(f"{name}={target!r}".encode("utf-8"))
+
+    return f"{fn.__qualname__}:{digest.hexdigest()}"
+
+
+def _canonical_in(value, seen):
+    # _canonical, but keeps the recursion guard when closures hold functions
+    if callable(value) and not isinstance(value, type):
+        return function_fingerprint(value, seen)
+    if isinstance(value, (list, tuple)):
+        return [_canonical_in(v, seen) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical_in(v, seen) for k, v in sorted(value.items())}
+    return _canonical(value)
+
+
+def bound_parameters(fn, *args, **kwargs):
+    # Every parameter of fn after the two sequences, defaults included
+    try:
+        bound = inspect.signature(fn).bind(None, None, *args, **kwargs)
+    except ValueError:
+        # No signature available (compiled extension): only what was passed
+        return dict(kwargs, __args__=list(args))
+    bound.apply_defaults()
+    return dict(list(bound.arguments.items())[2:])
+
+
+def alignment_key(method, seq1, seq2, params=None):
+    digest = hashlib.blake2b(digest_size=20)
+    for part in (method, _canonical(seq1), _canonical(seq2), _canonical(params or {})):
+        digest.update(json.dumps(part, separators=(",", ":")).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class AlignmentCache:
+    # LRU timestamps of hits are buffered and written with the next put,
+    # every TOUCH_BATCH hits, or on close
+    TOUCH_BATCH = 256
+
+    def __init__(self, path="alignment_cache.sqlite", max_bytes=256 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.pending_touches = {}
+
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        # WAL lets query-service workers read while one of them writes
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS alignments (
+                               key TEXT PRIMARY KEY,
+                               method TEXT,
+                               score REAL,
+                               span TEXT,
+                               path BLOB,
+                               size INTEGER,
+                               last_used REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS alignments_lru ON alignments (last_used)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)")
+        # Running byte total, so puts don't have to SUM the whole table
+        self.db.execute("""INSERT OR IGNORE INTO meta
+                           SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM alignments""")
+
+    def get(self, key):
+        row = self.db.execute("SELECT score, span, path FROM alignments WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.pending_touches[key] = time.time()
+        if len(self.pending_touches) >= self.TOUCH_BATCH:
+            self.flush_touches()
+        score, span, path = row
+        return {
+            "score": score,
+            "span": json.loads(span) if span else None,
+            "path": json.loads(zlib.decompress(path)) if path else None,
+        }
+
+    def flush_touches(self):
+        if not self.pending_touches:
+            return
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self._write_touches()
+
+    def _write_touches(self):
+        touches = [(used, key) for key, used in self.pending_touches.items()]
+        self.pending_touches = {}
+        self.db.executemany("UPDATE alignments SET last_used = ? WHERE key = ?", touches)
+
+    def put(self, key, method, score, span=None, path=None):
+        span_text = json.dumps(_canonical(span)) if span is not None else None
+        path_blob = zlib.compress(json.dumps(_canonical(path)).encode("utf-8")) if path is not None else None
+        size = len(key) + len(span_text or "") + len(path_blob or b"") + 64
+
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self._write_touches()
+            old = self.db.execute("SELECT size FROM alignments WHERE key = ?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO alignments VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (key, method, float(score), span_text, path_blob, size, time.time()))
+            self.db.execute("UPDATE meta SET value = value + ? WHERE name = 'total_bytes'",
+                            (size - (old[0] if old else 0),))
+            total = self.db.execute("SELECT value FROM meta WHERE name = 'total_bytes'").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(total)
+
+    def _evict(self, total):
+        # Runs inside put's transaction. Evict down to 90% of max_bytes so the
+        # next puts don't each trigger another eviction pass.
+        target = int(0.9 * self.max_bytes)
+        freed = 0
+        victims = []
+        for key, size in self.db.execute("SELECT key, size FROM alignments ORDER BY last_used"):
+            if total - freed <= target:
+                break
+            victims.append((key,))
+            freed += size
+        self.db.executemany("DELETE FROM alignments WHERE key = ?", victims)
+        self.db.execute("UPDATE meta SET value = value - ? WHERE name = 'total_bytes'", (freed,))
+
+    def compute(self, method, seq1, seq2, params, fn, keep_path=False):
+        # fn(seq1, seq2) -> (score, span, path); span and path may be None
+        key = alignment_key(method, seq1, seq2, params)
+        entry = self.get(key)
+        if entry is not None and (entry["path"] is not None or not keep_path):
+            return entry["score"], entry["span"], entry["path"]
+
+        score, span, path = fn(seq1, seq2)
+        self.put(key, method, score, span, path if keep_path else None)
+        return score, span, path
+
+    def stats(self):
+        count = self.db.execute("SELECT COUNT(*) FROM alignments").fetchone()[0]
+        total = self.db.execute("SELECT value FROM meta WHERE name = 'total_bytes'").fetchone()[0]
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.flush_touches()
+        self.db.close()
+
+
+# === Cached versions of the alignments used in the project ===
+
+def cached_smith_waterman_score(cache, query, target, **scoring):
+    from interval_search import smith_waterman_score
+
+    def run(q, t):
+        score, query_end, target_end = smith_waterman_score(q, t, **scoring)
+        return score, [query_end, target_end], None
+
+    params = bound_parameters(smith_waterman_score, **scoring)
+    params["scorer"] = smith_waterman_score
+    score, span, _ = cache.compute("smith_waterman", query, target, params, run)
+    return int(score), span[0], span[1]
+
+
+def cached_dtw(cache, seq1, seq2, dist=None, radius=1, keep_path=False, dist_id=None):
+    from fastdtw import fastdtw
+
+    def run(a, b):
+        distance, path = fastdtw(a, b, radius=radius, dist=dist)
+        return distance, [path[0], path[-1]] if path else None, path
+
+    params = bound_parameters(fastdtw, radius=radius, dist=None)
+    # dist_id names a distance function that can't be fingerprinted (or pins one on purpose)
+    params["dist"] = dist_id if dist_id is not None else dist
+    score, _, path = cache.compute("fastdtw", seq1, seq2, params, run, keep_path=keep_path)
+    return score, path
@@ -0,0 +1,124 @@
+import os
+import json
+import numpy as np
+
+# === Transposition-aware chroma search ===
+#
+# Scores a chroma_duration query ([[chroma, duration], ...], chroma 1..12 as
+# produced by chroma_encode) against a target under all 12 key rotations in a
+# single Smith-Waterman pass. Every DP row carries 12 lanes, one per rotation,
+# and the row is filled with vector operations instead of a per-cell loop.
+#
+# Rotation r means the query transposed up r semitones, so with r applied a
+# query chroma c lines up with target chroma (c - 1 + r) % 12 + 1.
+
+ROTATIONS = 12
+
+
+def split_chroma_duration(seq):
+    arr = np.asarray(seq, dtype=np.float64).reshape(-1, 2)
+    chroma = arr[:, 0].astype(np.int64) - 1  # back to 0=C, ..., 11=B
+    durations = arr[:, 1]
+    return chroma, durations
+
+
+def rotated_smith_waterman(query, target, match=3.0, mismatch=-1.0, gap_penalty=2.0, duration_weight=1.0):
+    q_chroma, q_dur = split_chroma_duration(query)
+    t_chroma, t_dur = split_chroma_duration(target)
+    m, n = len(q_chroma), len(t_chroma)
+
+    best_scores = np.zeros(ROTATIONS)
+    best_ends = [(0, 0)] * ROTATIONS
+    if m == 0 or n == 0:
+        return _rotation_result(best_scores, best_ends)
+
+    # one_hot[p, j] is True when target note j has pitch class p
+    one_hot = np.zeros((ROTATIONS, n), dtype=bool)
+    one_hot[t_chroma, np.arange(n)] = True
+    lanes = np.arange(ROTATIONS)
+
+    # Linear gap penalties let the left-to-right dependency of a row be solved
+    # with a running maximum: H[j] = max_k(E[k] - g * (j - k)).
+    ramp = gap_penalty * np.arange(1, n + 1)
+    prev = np.zeros((ROTATIONS, n + 1))
+    row = np.zeros((ROTATIONS, n + 1))
+
+    for i in range(m):
+        is_match = one_hot[(q_chroma[i] + lanes) % ROTATIONS]
+        sub = np.where(is_match, match, mismatch) - duration_weight * np.abs(q_dur[i] - t_dur)
+
+        open_cells = np.maximum(prev[:, :-1] + sub, prev[:, 1:] - gap_penalty)
+        np.maximum(open_cells, 0.0, out=open_cells)
+        row[:, 1:] = np.maximum.accumulate(open_cells + ramp, axis=1) - ramp
+
+        row_best = row[:, 1:].argmax(axis=1)
+        row_scores = row[lanes, row_best + 1]
+        improved = row_scores > best_scores
+        for r in np.nonzero(improved)[0]:
+            best_scores[r] = row_scores[r]
+            best_ends[r] = (i + 1, int(row_best[r]) + 1)
+
+        prev, row = row, prev
+
+    return _rotation_result(best_scores, best_ends)
+
+
+def _rotation_result(best_scores, best_ends):
+    rotation = int(best_scores.argmax())
+    return {
+        "rotation": rotation,
+        "score": float(best_scores[rotation]),
+        "query_end": best_ends[rotation][0],
+        "target_end": best_ends[rotation][1],
+        "rotation_scores": [float(s) for s in best_scores],
+    }
+
+
+# === Corpus search over chroma_duration JSONs ===
+
+def load_chroma_tracks(base_dir):
+    tracks = []
+    for artist in os.listdir(base_dir):
+        artist_path = os.path.join(base_dir, artist)
+        if not os.path.isdir(artist_path):
+            continue
+
+        for file in os.listdir(artist_path):
+            if not file.lower().endswith(".json"):
+                continue
+
+            try:
+                with open(os.path.join(artist_path, file)) as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Failed to load {file}: {e}")
+                continue
+
+            song_name = os.path.splitext(file)[0]
+            for idx, track in enumerate(data):
+                chroma_dur_seq = track.get("chroma_duration") if isinstance(track, dict) else None
+                if chroma_dur_seq:
+                    tracks.append((artist, song_name, idx, track.get("instrument", "Unknown"), chroma_dur_seq))
+    return tracks
+
+
+def search_chroma_tracks(query, tracks, top_k=10, **scoring):
+    results = []
+    for artist, song, idx, instrument, chroma_dur_seq in tracks:
+        result = rotated_smith_waterman(query, chroma_dur_seq, **scoring)
+        result.update({"artist": artist, "song": song, "track": idx, "instrument": instrument})
+        results.append(result)
+    results.sort(key=lambda r: r["score"], reverse=True)
+    return results[:top_k]
+
+
+if __name__ == "__main__":
+    corpus_dir = r"Z:\clean_midi_deduplicated_and_bytes_text_n_gram"
+    query_json_path = r"Z:\clean_midi_deduplicated_and_bytes_text_n_gram\Puff Daddy\I'll Be Missing You.1.json"
+
+    with open(query_json_path) as f:
+        query_tracks = json.load(f)
+    query = max(query_tracks, key=lambda t: len(t.get("chroma_duration", [])))["chroma_duration"]
+
+    for hit in search_chroma_tracks(query, load_chroma_tracks(corpus_dir)):
+        print(f"{hit['score']:8.2f} | +{hit['rotation']:2} semitones | {hit['artist']} - {hit['song']} (track {hit['track']}, {hit['instrument']})")
@@ -0,0 +1,203 @@
+import time
+import tracemalloc
+
+# === Per-stage profiling for the corpus drivers ===
+#
+# Usage inside a driver loop:
+#
+#     profiler = CorpusProfiler(report_every=250, top_n=25)
+#     for file_path in ...:
+#         with profiler.file(file_path):
+#             with profiler.stage("parse"):
+#                 pm = pretty_midi.PrettyMIDI(file_path)
+#             profiler.add_notes(note_count)
+#     profiler.finish("corpus_profile.txt")
+#
+# Drivers default to NULL_PROFILER, whose methods do nothing, so leaving
+# profiling off costs one attribute lookup per call site.
+
+
+class FileRecord:
+    def __init__(self, path):
+        self.path = path
+        self.total = 0.0
+        self.stages = {}
+        self.notes = 0
+        self.peak_bytes = 0  # tracemalloc peak above what was allocated when the file started
+        self.failed = False
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._add_stage_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _File:
+    def __init__(self, profiler, path):
+        self.profiler = profiler
+        self.path = path
+
+    def __enter__(self):
+        self.profiler._start_file(self.path)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._end_file(failed=exc_type is not None)
+        return False
+
+
+class CorpusProfiler:
+    def __init__(self, report_every=100, top_n=20, track_memory=False, log=print):
+        self.report_every = report_every
+        self.top_n = top_n
+        self.track_memory = track_memory
+        self.log = log
+
+        self.records = []
+        self.stage_totals = {}
+        self.total_notes = 0
+        self.current = None
+        self._file_start = 0.0
+        self._file_baseline = 0
+        self.run_start = time.perf_counter()
+        self._started_tracemalloc = False
+
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    # --- Driver hooks ---
+
+    def file(self, path):
+        return _File(self, path)
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add_notes(self, count):
+        if self.current is not None:
+            self.current.notes += count
+        self.total_notes += count
+
+    def mark_failed(self):
+        if self.current is not None:
+            self.current.failed = True
+
+    def finish(self, report_path=None):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.log(self.throughput_line())
+        if report_path:
+            self.write_report(report_path)
+            self.log(f" Profile report saved to: {report_path}")
+
+    # --- Bookkeeping ---
+
+    def _start_file(self, path):
+        self.current = FileRecord(path)
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            self._file_baseline = tracemalloc.get_traced_memory()[0]
+        self._file_start = time.perf_counter()
+
+    def _end_file(self, failed=False):
+        record = self.current
+        if record is None:
+            return
+        record.total = time.perf_counter() - self._file_start
+        record.failed = record.failed or failed
+        if self.track_memory:
+            record.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - self._file_baseline)
+        self.records.append(record)
+        self.current = None
+
+        if self.report_every and len(self.records) % self.report_every == 0:
+            self.log(self.throughput_line())
+
+    def _add_stage_time(self, name, elapsed):
+        self.stage_totals[name] = self.stage_totals.get(name, 0.0) + elapsed
+        if self.current is not None:
+            self.current.stages[name] = self.current.stages.get(name, 0.0) + elapsed
+
+    # --- Reporting ---
+
+    def throughput_line(self):
+        elapsed = max(time.perf_counter() - self.run_start, 1e-9)
+        files = len(self.records)
+        stages = ", ".join(f"{name} {secs:.1f}s" for name, secs in self.stage_totals.items())
+        return (f"[profile] {files} files in {elapsed:.1f}s | "
+                f"{files / elapsed:.2f} files/s | {self.total_notes / elapsed:.0f} notes/s"
+                + (f" | {stages}" if stages else ""))
+
+    def slowest(self, n=None):
+        n = self.top_n if n is None else n
+        return sorted(self.records, key=lambda r: r.total, reverse=True)[:n]
+
+    def write_report(self, report_path):
+        elapsed = time.perf_counter() - self.run_start
+        stage_sum = sum(self.stage_totals.values()) or 1e-9
+
+        with open(report_path, "w", encoding="utf-8") as out:
+            out.write("Corpus profile\n\n")
+            out.write(f"Files processed : {len(self.records)}\n")
+            out.write(f"Failed files    : {sum(r.failed for r in self.records)}\n")
+            out.write(f"Notes           : {self.total_notes}\n")
+            out.write(f"Elapsed time    : {elapsed:.2f} seconds\n")
+            out.write(f"{self.throughput_line()}\n")
+
+            out.write("\n Stage totals:\n")
+            for name, secs in sorted(self.stage_totals.items(), key=lambda kv: kv[1], reverse=True):
+                out.write(f"  - {name:12} {secs:10.2f}s ({100 * secs / stage_sum:5.1f}%)\n")
+
+            out.write(f"\n Top {self.top_n} slowest files:\n")
+            for record in self.slowest():
+                stages = ", ".join(f"{name} {secs:.3f}s" for name, secs in record.stages.items())
+                peak = f" | peak {record.peak_bytes / 2**20:.1f} MiB" if self.track_memory else ""
+                failed = " | FAILED" if record.failed else ""
+                out.write(f"{record.total:9.3f}s | {record.notes:7} notes{peak}{failed} | {record.path}\n")
+                if stages:
+                    out.write(f"           {stages}\n")
+
+
+class _NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullProfiler:
+    _context = _NullContext()
+
+    def __bool__(self):
+        return False
+
+    def file(self, path):
+        return self._context
+
+    def stage(self, name):
+        return self._context
+
+    def add_notes(self, count):
+        pass
+
+    def mark_failed(self):
+        pass
+
+    def finish(self, report_path=None):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+from datetime import datetime
+import pretty_midi
+
+from corpus_profiler import CorpusProfiler, NULL_PROFILER
+from interval_corpus import IntervalCorpus, load_script
+from interval_store import IntervalStore
+
+# === Incremental ingest of new MIDI drops ===
+#
+# Instead of rerunning scan_and_copy_midi -> process_all_midis -> run_parse
+# over everything, a new drop (same artist/song.mid layout as clean_midi) is:
+#   1. deduplicated against what is already in the corpus, by file content
+#      hash and by the fuzzy song-name match used in scan_and_copy_midi,
+#   2. checked with is_valid_midi_range and copied into the deduplicated MIDI
+#      tree, as scan_and_copy_midi does,
+#   3. extracted with process_midi_file from the interval script, writing the
+#      usual per-song JSON next to the existing ones,
+#   4. appended to the IntervalStore as one new segment (intervals, metadata
+#      and n-gram postings), leaving older segments untouched.
+# Compaction of the accumulated segments runs afterwards in a background thread.
+#
+# The ledger of ingested hashes and names lives in the store as ingested.json.
+
+LEDGER_FILE = "ingested.json"
+
+
+def file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_ledger(store):
+    path = os.path.join(store.store_dir, LEDGER_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"hashes": {}, "names": {}}
+
+
+def save_ledger(store, ledger):
+    path = os.path.join(store.store_dir, LEDGER_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(ledger, f)
+    os.replace(path + ".tmp", path)
+
+
+def bootstrap_store(store, midi_dir, json_dir, dedup):
+    # First run against an existing corpus: the current JSON tree becomes
+    # segment 0 and the deduplicated MIDI files go into the ledger by hash
+    ledger = load_ledger(store)
+    if store.segments or not os.path.isdir(json_dir):
+        return ledger
+
+    print(f" Seeding interval store from existing corpus: {json_dir}")
+    store.append_segment(IntervalCorpus.from_json_dir(json_dir))
+
+    if os.path.isdir(midi_dir):
+        print(f" Hashing existing MIDI files: {midi_dir}")
+        for artist in sorted(os.listdir(midi_dir)):
+            artist_path = os.path.join(midi_dir, artist)
+            if not os.path.isdir(artist_path):
+                continue
+            for file in sorted(os.listdir(artist_path)):
+                if file.lower().endswith(('.mid', '.midi')):
+                    ledger["hashes"].setdefault(file_digest(os.path.join(artist_path, file)), f"{artist}/{file}")
+
+    for artist in os.listdir(json_dir):
+        artist_path = os.path.join(json_dir, artist)
+        if os.path.isdir(artist_path):
+            ledger["names"][artist] = [dedup.normalize_filename(os.path.splitext(file)[0])
+                                       for file in sorted(os.listdir(artist_path))
+                                       if file.lower().endswith(".json")]
+    save_ledger(store, ledger)
+    return ledger
+
+
+def ingest_new_midis(drop_dir, midi_dir, json_dir, store_dir, log_file="ingest_log.txt", compact_after=4,
+                     profiler=NULL_PROFILER, profile_report=None):
+    start_time = time.time()
+    dedup = load_script("584A Project Preprocessing With Copy.py")
+    extractor = load_script("584A Output JSON Interval Pitch Differences.py")
+
+    store = IntervalStore(store_dir)
+    ledger = bootstrap_store(store, midi_dir, json_dir, dedup)
+
+    new_tracks = []
+    added_count = 0
+    duplicate_count = 0
+    failure_count = 0
+
+    # Appends, so earlier drops stay in the log
+    with open(log_file, "a", encoding="utf-8") as log:
+        log.write(f"\nIngest started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} from {drop_dir}\n")
+
+        for artist in sorted(os.listdir(drop_dir)):
+            artist_path = os.path.join(drop_dir, artist)
+            if not os.path.isdir(artist_path):
+                continue
+
+            seen_song_names = ledger["names"].setdefault(artist, [])
+            artist_midi_path = os.path.join(midi_dir, artist)
+            artist_output_path = os.path.join(json_dir, artist)
+
+            for file in sorted(os.listdir(artist_path)):
+                if not file.lower().endswith(('.mid', '.midi')):
+                    continue
+
+                file_path = os.path.join(artist_path, file)
+                with profiler.file(file_path):
+                    with profiler.stage("dedup"):
+                        digest = file_digest(file_path)
+                        normalized_name = dedup.normalize_filename(file)
+                        known = ledger["hashes"].get(digest)
+                        similar = known is None and dedup.is_similar(normalized_name, seen_song_names)
+
+                    if known is not None or similar:
+                        reason = f"same content as {known}" if known else "fuzzy match"
+                        log.write(f"Duplicate ({reason}) skipped: {file_path}\n")
+                        duplicate_count += 1
+                        continue
+
+                    try:
+                        with profiler.stage("parse"):
+                            midi_data = pretty_midi.PrettyMIDI(file_path)
+
+                        with profiler.stage("validate"):
+                            valid = dedup.is_valid_midi_range(midi_data)
+                        if not valid:
+                            raise ValueError("Data byte out of 0..127 range")
+
+                    except Exception as e:
+                        profiler.mark_failed()
+                        print(f"Failed: {file_path} | Reason: {type(e).__name__}: {e}")
+                        log.write(f"{file_path} | Reason: {type(e).__name__}: {e}\n")
+                        failure_count += 1
+                        continue
+
+                    data, error = extractor.process_midi_file(file_path, profiler=profiler, pm=midi_data)
+                    if data is None:
+                        profiler.mark_failed()
+                        print(error)
+                        log.write(f"{file_path} | Reason: {error.strip()}\n")
+                        failure_count += 1
+                        continue
+
+                    os.makedirs(artist_midi_path, exist_ok=True)
+                    midi_dest_path = os.path.join(artist_midi_path, file)
+                    with profiler.stage("copy"):
+                        shutil.copy2(file_path, midi_dest_path)
+
+                    song_name = os.path.splitext(file)[0]
+                    os.makedirs(artist_output_path, exist_ok=True)
+                    output_path = os.path.join(artist_output_path, f"{song_name}.json")
+                    with profiler.stage("write"):
+                        with open(output_path, "w") as f:
+                            json.dump(data, f, indent=2)
+
+                    new_tracks.extend((artist, song_name, track) for track in data)
+                    ledger["hashes"][digest] = f"{artist}/{file}"
+                    seen_song_names.append(normalized_name)
+                    log.write(f"{file_path} -> {midi_dest_path}, {output_path}\n")
+                    added_count += 1
+
+        with profiler.stage("append"):
+            segment = store.append_segment(IntervalCorpus.from_tracks(new_tracks))
+        save_ledger(store, ledger)
+
+        elapsed = time.time() - start_time
+        log.write(f"{added_count} new files added as {segment or 'no new segment'}\n")
+        log.write(f"{duplicate_count} duplicates skipped\n")
+        log.write(f"{failure_count} failed files\n")
+        log.write(f"Elapsed time: {elapsed:.2f} seconds\n")
+
+    print(f"\n Added {added_count} files ({len(new_tracks)} tracks), skipped {duplicate_count} duplicates, "
+          f"{failure_count} failed in {elapsed:.2f} seconds")
+    print(f" Store now has {len(store.segments)} segments in {store_dir}")
+    profiler.finish(profile_report)
+
+    return store.compact_in_background(max_segments=compact_after)
+
+
+PROFILE = False  # True writes a per-stage timing report for the run
+
+if __name__ == "__main__":
+    compaction = ingest_new_midis(
+        drop_dir=r"C:\Users\Ben Dizdar\Downloads\clean_midi\weekly_drop",
+        midi_dir=r"C:\Users\Ben Dizdar\Downloads\clean_midi\clean_midi_deduplicated_and_bytes",
+        json_dir=r"Z:\clean_midi_deduplicated_and_bytes_intervals_only",
+        store_dir=r"Z:\clean_midi_interval_store",
+        profiler=CorpusProfiler(report_every=100, top_n=10) if PROFILE else NULL_PROFILER,
+        profile_report="ingest_profile.txt" if PROFILE else None,
+    )
+    compaction.join()
@@ -0,0 +1,203 @@
+import os
+import json
+import importlib.util
+from multiprocessing import shared_memory
+import numpy as np
+
+# === Concatenated interval corpus ===
+#
+# Python counterpart of run_parse in Directory_Manager.cpp: every track's
+# pitch_intervals from the intervals-only JSON tree are concatenated into one
+# int8 array with a -128 separator after each track. Pitch differences never
+# leave -127..127, so -128 can't collide with real data.
+#
+#   values[offsets[t]:offsets[t + 1] - 1]  -> intervals of track t
+#   tracks[t] -> (artist, song, track_index, instrument_name, program, is_drum)
+
+SEPARATOR = -128
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class IntervalCorpus:
+    def __init__(self, values, offsets, tracks):
+        self.values = values
+        self.offsets = offsets
+        self.tracks = tracks
+        self._shared_blocks = []
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def track_intervals(self, t):
+        return self.values[self.offsets[t]:self.offsets[t + 1] - 1]
+
+    @classmethod
+    def from_tracks(cls, entries):
+        # entries: (artist, song, track dict) as written by process_midi_file
+        chunks = []
+        offsets = [0]
+        tracks = []
+
+        for artist, song_name, track in entries:
+            intervals = track.get("pitch_intervals")
+            if not isinstance(intervals, list) or not intervals:
+                continue
+
+            chunks.append(np.asarray(intervals + [SEPARATOR], dtype=np.int8))
+            offsets.append(offsets[-1] + len(intervals) + 1)
+            tracks.append((artist, song_name,
+                           int(track.get("track_index", -1)),
+                           str(track.get("instrument_name", "Unknown")),
+                           int(track.get("program", -1)),
+                           bool(track.get("is_drum", False))))
+
+        values = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int8)
+        return cls(values, np.asarray(offsets, dtype=np.int64), tracks)
+
+    @classmethod
+    def from_json_dir(cls, base_dir):
+        return cls.from_tracks(iter_json_tracks(base_dir))
+
+    def share(self):
+        return SharedCorpus(self)
+
+    @classmethod
+    def attach(cls, handle):
+        values_block = _open_block(handle["values"][0])
+        offsets_block = _open_block(handle["offsets"][0])
+        meta_block = _open_block(handle["tracks"][0])
+        meta_offsets_block = _open_block(handle["track_offsets"][0])
+
+        values = np.ndarray((handle["values"][1],), dtype=np.int8, buffer=values_block.buf)
+        offsets = np.ndarray((handle["offsets"][1],), dtype=np.int64, buffer=offsets_block.buf)
+        meta = np.ndarray((meta_block.size,), dtype=np.uint8, buffer=meta_block.buf)
+        meta_offsets = np.ndarray((handle["track_offsets"][1],), dtype=np.int64, buffer=meta_offsets_block.buf)
+        for arr in (values, offsets, meta, meta_offsets):
+            arr.flags.writeable = False
+
+        tracks = SharedTracks(meta, meta_offsets)
+        tracks._shared_blocks = [meta_block, meta_offsets_block]
+        corpus = cls(values, offsets, tracks)
+        corpus._shared_blocks = [values_block, offsets_block, meta_block, meta_offsets_block]
+        return corpus
+
+
+def iter_json_tracks(base_dir):
+    for artist in sorted(os.listdir(base_dir)):
+        artist_path = os.path.join(base_dir, artist)
+        if not os.path.isdir(artist_path):
+            continue
+
+        for file in sorted(os.listdir(artist_path)):
+            if not file.lower().endswith(".json"):
+                continue
+
+            song_path = os.path.join(artist_path, file)
+            try:
+                with open(song_path) as f:
+                    track_data = json.load(f)
+            except Exception as e:
+                print(f"JSON parse error in {song_path}: {e}")
+                continue
+
+            song_name = os.path.splitext(file)[0]
+            for track in track_data:
+                yield artist, song_name, track
+
+
+# === Shared-memory corpus for multi-process workers ===
+#
+# The owner copies the corpus into multiprocessing.shared_memory blocks once;
+# workers call IntervalCorpus.attach(shared.handle) and get read-only numpy
+# views on the same pages, so adding workers doesn't add copies of the
+# intervals. Track metadata is stored as JSON lines and decoded per lookup.
+#
+#     shared = corpus.share()
+#     pool = ProcessPoolExecutor(initializer=init, initargs=(shared.handle,))
+#     ...
+#     shared.close()   # owner only, unlinks the blocks
+
+class SharedCorpus:
+    def __init__(self, corpus):
+        meta = [json.dumps(list(track)).encode("utf-8") for track in corpus.tracks]
+        meta_offsets = np.zeros(len(meta) + 1, dtype=np.int64)
+        np.cumsum([len(m) for m in meta], out=meta_offsets[1:])
+
+        self.blocks = []
+        self.handle = {
+            "values": self._copy_in(np.ascontiguousarray(corpus.values, dtype=np.int8)),
+            "offsets": self._copy_in(np.ascontiguousarray(corpus.offsets, dtype=np.int64)),
+            "tracks": self._copy_in(np.frombuffer(b"".join(meta), dtype=np.uint8)),
+            "track_offsets": self._copy_in(meta_offsets),
+        }
+
+    def _copy_in(self, arr):
+        block = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[:] = arr
+        self.blocks.append(block)
+        return block.name, len(arr)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+class SharedTracks:
+    def __init__(self, buf, offsets):
+        self.buf = buf
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, t):
+        if not 0 <= t < len(self):
+            raise IndexError(t)
+        raw = self.buf[self.offsets[t]:self.offsets[t + 1]].tobytes()
+        return tuple(json.loads(raw))
+
+    def __iter__(self):
+        return (self[t] for t in range(len(self)))
+
+
+def _open_block(name):
+    # Attaching processes must not unlink the owner's blocks when they exit
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+# === Access to the preprocessing scripts ===
+#
+# The preprocessing scripts have spaces in their file names, so they can't be
+# imported normally. Only scripts guarded by __main__ are safe to load.
+# Each script is executed once per process and reused afterwards.
+
+INTERVAL_SCRIPT = "584A Output JSON Interval Pitch Differences.py"
+
+_loaded_scripts = {}
+
+
+def load_script(file_name, module_name=None):
+    path = os.path.join(SCRIPT_DIR, file_name)
+    if path in _loaded_scripts:
+        return _loaded_scripts[path]
+
+    module_name = module_name or os.path.splitext(file_name)[0].replace(" ", "_").replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _loaded_scripts[path] = module
+    return module
+
+
+def midi_track_intervals(midi_path):
+    interval_script = load_script(INTERVAL_SCRIPT)
+    track_results, error = interval_script.process_midi_file(midi_path)
+    if track_results is None:
+        raise ValueError(error.strip())
+    return track_results
@@ -0,0 +1,77 @@
+from collections import Counter, defaultdict
+import numpy as np
+from alignment_cache import cached_smith_waterman_score
+
+# === n-gram candidate index over an IntervalCorpus ===
+#
+# Same idea as get_interval_ngrams in 584A Output ngram JSON files: tracks
+# that share interval n-grams with the query are the only ones worth aligning.
+# n-grams are keyed by their raw int8 bytes.
+
+
+def build_ngram_index(corpus, n=4):
+    index = defaultdict(list)
+    add_tracks_to_index(index, corpus, range(len(corpus)), n)
+    return index
+
+
+def add_tracks_to_index(index, corpus, track_ids, n=4):
+    for t in track_ids:
+        raw = corpus.track_intervals(t).tobytes()
+        for gram in {raw[i:i + n] for i in range(len(raw) - n + 1)}:
+            index[gram].append(t)
+
+
+def query_ngrams(query, n=4):
+    raw = np.asarray(query, dtype=np.int8).tobytes()
+    return {raw[i:i + n] for i in range(len(raw) - n + 1)}
+
+
+def candidate_tracks(index, query, n=4, limit=200):
+    shared = Counter()
+    for gram in query_ngrams(query, n):
+        shared.update(index.get(gram, ()))
+    return shared.most_common(limit)
+
+
+# === Smith-Waterman over interval sequences ===
+#
+# Scoring follows test_sigma in 584_final.cpp (match 3, mismatch -1, gap 5).
+# Rows are filled with vector operations: with linear gaps the left-to-right
+# dependency is a running maximum, H[j] = max_k(E[k] - g * (j - k)).
+
+def smith_waterman_score(query, target, match=3, mismatch=-1, gap_penalty=5):
+    q = np.asarray(query, dtype=np.int16)
+    t = np.asarray(target, dtype=np.int16)
+    m, n = len(q), len(t)
+    if m == 0 or n == 0:
+        return 0, 0, 0
+
+    ramp = gap_penalty * np.arange(1, n + 1, dtype=np.int64)
+    prev = np.zeros(n + 1, dtype=np.int64)
+    row = np.zeros(n + 1, dtype=np.int64)
+    best_score, best_i, best_j = 0, 0, 0
+
+    for i in range(m):
+        sub = np.where(t == q[i], match, mismatch)
+        open_cells = np.maximum(prev[:-1] + sub, prev[1:] - gap_penalty)
+        np.maximum(open_cells, 0, out=open_cells)
+        row[1:] = np.maximum.accumulate(open_cells + ramp) - ramp
+
+        j = int(row.argmax())
+        if row[j] > best_score:
+            best_score, best_i, best_j = int(row[j]), i + 1, j
+        prev, row = row, prev
+
+    return best_score, best_i, best_j
+
+
+def rank_tracks(corpus, query, track_ids, cache=None, **scoring):
+    results = []
+    for t in track_ids:
+        if cache is None:
+            score, query_end, target_end = smith_waterman_score(query, corpus.track_intervals(t), **scoring)
+        else:
+            score, query_end, target_end = cached_smith_waterman_score(cache, query, corpus.track_intervals(t), **scoring)
+        results.append((score, t, query_end, target_end))
+    return results
@@ -0,0 +1,180 @@
+import os
+import json
+import pickle
+import threading
+import numpy as np
+
+from interval_corpus import IntervalCorpus
+from interval_search import build_ngram_index
+
+# === Segmented on-disk interval store ===
+#
+# The store holds the concatenated interval corpus as a list of segments so
+# new MIDI drops can be appended without rebuilding what is already there:
+#
+#   manifest.json             segment order, ngram_n, next segment number
+#   segment_0000.npz          values (int8, -128 separated) and offsets
+#   segment_0000.tracks.json  track metadata, same tuples as IntervalCorpus.tracks
+#   segment_0000.ngrams.pkl   n-gram postings with segment-local track ids
+#
+# Loading concatenates the segments in manifest order, so global track ids
+# are stable across appends and compaction. The manifest is always replaced
+# atomically, after the files it points to are written.
+#
+# Compaction is size-tiered: only the run of small segments at the end is
+# merged, so the large seed segment isn't rewritten on every drop. Merged
+# segments are listed as tombstones and deleted on the next compaction, so a
+# reader that took a snapshot just before can still open them.
+
+
+class IntervalStore:
+    def __init__(self, store_dir, ngram_n=4):
+        self.store_dir = store_dir
+        self.lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+        self.manifest_path = os.path.join(store_dir, "manifest.json")
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"ngram_n": ngram_n, "next_segment": 0, "segments": [], "tombstones": []}
+            self._write_manifest()
+
+    @property
+    def ngram_n(self):
+        return self.manifest["ngram_n"]
+
+    @property
+    def segments(self):
+        return list(self.manifest["segments"])
+
+    def _path(self, name, suffix):
+        return os.path.join(self.store_dir, f"{name}{suffix}")
+
+    def snapshot(self):
+        # Current segment list, re-read from disk in case another process
+        # (an ingest run) changed the store since this one was opened
+        with self.lock:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+            return self.segments
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # --- Writing ---
+
+    def _write_segment(self, corpus, index=None):
+        name = f"segment_{self.manifest['next_segment']:04d}"
+        self.manifest["next_segment"] += 1
+
+        np.savez(self._path(name, ".npz"), values=corpus.values, offsets=corpus.offsets)
+        with open(self._path(name, ".tracks.json"), "w") as f:
+            json.dump([list(track) for track in corpus.tracks], f)
+        with open(self._path(name, ".ngrams.pkl"), "wb") as f:
+            if index is None:
+                index = build_ngram_index(corpus, n=self.ngram_n)
+            pickle.dump(dict(index), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return {"name": name, "tracks": len(corpus), "intervals": int(len(corpus.values))}
+
+    def append_segment(self, corpus):
+        if len(corpus) == 0:
+            return None
+        with self.lock:
+            entry = self._write_segment(corpus)
+            self.manifest["segments"].append(entry)
+            self._write_manifest()
+        return entry["name"]
+
+    # --- Reading ---
+
+    def load_segment(self, name):
+        with np.load(self._path(name, ".npz")) as data:
+            values, offsets = data["values"], data["offsets"]
+        with open(self._path(name, ".tracks.json")) as f:
+            tracks = [tuple(track) for track in json.load(f)]
+        return IntervalCorpus(values, offsets, tracks)
+
+    def load(self, segments=None):
+        # Pass the same snapshot() to load and load_ngram_index so they agree
+        segments = self.snapshot() if segments is None else segments
+        parts = [self.load_segment(entry["name"]) for entry in segments]
+        if not parts:
+            return IntervalCorpus(np.zeros(0, dtype=np.int8), np.zeros(1, dtype=np.int64), [])
+
+        values = np.concatenate([part.values for part in parts])
+        offsets = [np.zeros(1, dtype=np.int64)]
+        tracks = []
+        base = 0
+        for part in parts:
+            offsets.append(part.offsets[1:] + base)
+            base += len(part.values)
+            tracks.extend(part.tracks)
+        return IntervalCorpus(values, np.concatenate(offsets), tracks)
+
+    def load_ngram_index(self, segments=None):
+        segments = self.snapshot() if segments is None else segments
+        index = {}
+        base = 0
+        for entry in segments:
+            with open(self._path(entry["name"], ".ngrams.pkl"), "rb") as f:
+                postings = pickle.load(f)
+            for gram, track_ids in postings.items():
+                shifted = [t + base for t in track_ids]
+                if gram in index:
+                    index[gram].extend(shifted)
+                else:
+                    index[gram] = shifted
+            base += entry["tracks"]
+        return index
+
+    # --- Compaction ---
+
+    def _remove_segment_files(self, name):
+        for suffix in (".npz", ".tracks.json", ".ngrams.pkl"):
+            path = self._path(name, suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def compact(self, max_segments=4, size_ratio=4):
+        # Once there are more than max_segments, merge the trailing run of
+        # segments in which no segment is more than size_ratio times the
+        # intervals of the ones after it. Segment order is kept, so track ids
+        # don't change.
+        with self.lock:
+            for name in self.manifest.get("tombstones", []):
+                self._remove_segment_files(name)
+            self.manifest["tombstones"] = []
+            self._write_manifest()
+
+            segments = self.segments
+            if len(segments) <= max_segments:
+                return None
+
+            run_size = segments[-1]["intervals"]
+            start = len(segments) - 1
+            while start > 0 and segments[start - 1]["intervals"] <= size_ratio * run_size:
+                start -= 1
+                run_size += segments[start]["intervals"]
+            old = segments[start:]
+            if len(old) < 2:
+                return None
+
+            merged = self._write_segment(self.load(old), self.load_ngram_index(old))
+            self.manifest["segments"] = segments[:start] + [merged]
+            self.manifest["tombstones"] = [entry["name"] for entry in old]
+            self._write_manifest()
+
+        print(f" Compacted {len(old)} segments into {merged['name']} "
+              f"({merged['tracks']} tracks, {merged['intervals']} intervals)")
+        return merged["name"]
+
+    def compact_in_background(self, max_segments=4, size_ratio=4):
+        thread = threading.Thread(target=self.compact, args=(max_segments, size_ratio), daemon=False)
+        thread.start()
+        return thread
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import asyncio
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+from alignment_cache import AlignmentCache
+from interval_corpus import IntervalCorpus, INTERVAL_SCRIPT, load_script, midi_track_intervals
+from interval_search import build_ngram_index, candidate_tracks, rank_tracks
+from interval_store import IntervalStore
+
+# === Warm plagiarism query service ===
+#
+# Loads the intervals-only corpus and its n-gram index once, then answers
+# queries over localhost HTTP:
+#
+#   POST /query   {"intervals": [...]}  or  {"midi_path": "...", "track_index": 2}
+#                 optional: "top_k", "candidates"
+#   GET  /health  corpus size and uptime
+#
+# The asyncio front end only does index lookups; Smith-Waterman rescoring of
+# the candidate tracks runs in a process pool so queries don't block each other.
+# With cache_path set, workers share an AlignmentCache so repeated pairs are
+# looked up instead of realigned. Workers attach to the corpus through shared
+# memory, so the intervals are held once no matter how many workers run.
+# Pass store_dir instead of corpus_dir to start from an IntervalStore (see
+# incremental_ingest.py), which also skips rebuilding the n-gram index.
+
+# --- Worker side ---
+
+_worker_corpus = None
+_worker_cache = None
+
+
+def _init_worker(corpus_handle, cache_path=None):
+    global _worker_corpus, _worker_cache
+    _worker_corpus = IntervalCorpus.attach(corpus_handle)
+    # Load the extraction script (and pretty_midi) up front so midi_path queries don't pay for it
+    try:
+        load_script(INTERVAL_SCRIPT)
+    except ImportError as e:
+        print(f" MIDI queries unavailable in worker: {e}")
+    if cache_path:
+        _worker_cache = AlignmentCache(cache_path)
+
+
+def _score_tracks(query, track_ids):
+    return rank_tracks(_worker_corpus, query, track_ids, cache=_worker_cache)
+
+
+def _query_from_midi(midi_path, track_index=None):
+    track_results = midi_track_intervals(midi_path)
+    if track_index is not None:
+        track_results = [t for t in track_results if t["track_index"] == track_index]
+    if not track_results:
+        raise ValueError(f"No usable track in {midi_path}")
+    # Same choice as choose_main_track: the longest interval list
+    return max(track_results, key=lambda t: len(t["pitch_intervals"]))["pitch_intervals"]
+
+
+# --- Service ---
+
+class QueryService:
+    def __init__(self, corpus_dir=None, workers=None, ngram_n=4, candidates=200, top_k=10, cache_path=None,
+                 store_dir=None):
+        self.corpus_dir = corpus_dir
+        self.cache_path = cache_path
+        self.workers = workers or os.cpu_count() or 1
+        self.ngram_n = ngram_n
+        self.candidates = candidates
+        self.top_k = top_k
+
+        start = time.time()
+        if store_dir:
+            store = IntervalStore(store_dir)
+            self.ngram_n = store.ngram_n
+            segments = store.snapshot()
+            self.corpus = store.load(segments)
+            self.index = store.load_ngram_index(segments)
+        else:
+            self.corpus = IntervalCorpus.from_json_dir(corpus_dir)
+            self.index = build_ngram_index(self.corpus, n=ngram_n)
+        print(f" Loaded {len(self.corpus)} tracks ({len(self.corpus.values)} intervals) "
+              f"and {len(self.index)} {self.ngram_n}-grams in {time.time() - start:.2f} seconds")
+
+        self.shared = self.corpus.share()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.shared.handle, cache_path))
+        self.started = time.time()
+
+    async def query(self, payload):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+
+        if "intervals" in payload:
+            query = [int(i) for i in payload["intervals"]]
+        elif "midi_path" in payload:
+            query = await loop.run_in_executor(self.pool, _query_from_midi,
+                                               payload["midi_path"], payload.get("track_index"))
+        else:
+            raise ValueError("Query needs 'intervals' or 'midi_path'")
+
+        if len(query) < self.ngram_n:
+            raise ValueError(f"Query needs at least {self.ngram_n} intervals")
+
+        shortlist = candidate_tracks(self.index, query, n=self.ngram_n,
+                                     limit=int(payload.get("candidates", self.candidates)))
+        shared = dict(shortlist)
+        track_ids = list(shared)
+
+        chunk = max(1, -(-len(track_ids) // self.workers))
+        jobs = [loop.run_in_executor(self.pool, _score_tracks, query, track_ids[i:i + chunk])
+                for i in range(0, len(track_ids), chunk)]
+        scored = [hit for part in await asyncio.gather(*jobs) for hit in part]
+        scored.sort(key=lambda hit: hit[0], reverse=True)
+
+        matches = []
+        for score, t, query_end, target_end in scored[:int(payload.get("top_k", self.top_k))]:
+            artist, song, track_index, instrument, program, is_drum = self.corpus.tracks[t]
+            matches.append({
+                "artist": artist,
+                "song": song,
+                "track_index": track_index,
+                "instrument_name": instrument,
+                "score": score,
+                "shared_ngrams": shared[t],
+                "query_end": query_end,
+                "target_end": target_end,
+            })
+
+        return {
+            "query_length": len(query),
+            "candidates": len(track_ids),
+            "elapsed_ms": round(1000 * (time.perf_counter() - start), 2),
+            "matches": matches,
+        }
+
+    def health(self):
+        return {
+            "tracks": len(self.corpus),
+            "intervals": int(len(self.corpus.values)),
+            "ngrams": len(self.index),
+            "workers": self.workers,
+            "alignment_cache": self.cache_path,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    # --- Minimal HTTP front end ---
+
+    async def read_request(self, reader):
+        # Raises ValueError or IncompleteReadError for anything malformed or cut short
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise ValueError("Malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError(f"Negative Content-Length {length}")
+        body = await reader.readexactly(length)
+        return request_line, body
+
+    async def route(self, request_line, body):
+        if request_line[0] == "GET" and request_line[1] == "/health":
+            return 200, self.health()
+        if request_line[0] == "POST" and request_line[1] == "/query":
+            try:
+                return 200, await self.query(json.loads(body or b"{}"))
+            except Exception as e:
+                return 400, {"error": f"{type(e).__name__}: {e}"}
+        return 404, {"error": "Use POST /query or GET /health"}
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                request_line, body = await self.read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                status, result = 400, {"error": f"Bad request: {type(e).__name__}: {e}"}
+            else:
+                status, result = await self.route(request_line, body)
+
+            payload = json.dumps(result).encode("utf-8")
+            reason = {200: "OK", 400: "Bad Request", 404: "Not Found"}[status]
+            writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass  # client hung up before the response could be sent
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8584):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f" Query service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown()
+            self.shared.close()
+
+
+# === Client helper ===
+
+def send_query(intervals=None, midi_path=None, host="127.0.0.1", port=8584, **options):
+    payload = dict(options)
+    if intervals is not None:
+        payload["intervals"] = list(intervals)
+    if midi_path is not None:
+        payload["midi_path"] = midi_path
+    request = urllib.request.Request(f"http://{host}:{port}/query", data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+if __name__ == "__main__":
+    service = QueryService(corpus_dir=r"Z:\clean_midi_deduplicated_and_bytes_intervals_only")
+    asyncio.run(service.serve())
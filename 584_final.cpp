@@ -17,6 +17,45 @@ int test_sigma(char a, char b) {
     return -1;
 }
 
+//with X unlimited and seed_len 1 the x-drop screen has to report exactly the tracks whose smith_waterman score reaches min_score
+bool check_xdrop_screen(const vector<char>& Q, const vector<char>& values, int min_score) {
+    std::map<interval, json_identifer> no_songs;
+    screen_stats stats;
+    auto screened = xdrop_screen(Q, values, 5, test_sigma, std::numeric_limits<int>::max() / 4, min_score, 1, stats, no_songs);
+
+    std::map<int, int> screen_scores;
+    for (auto& hit : screened) {
+        screen_scores[hit.track] = hit.score;
+    }
+
+    bool ok = true;
+    int track = 0;
+    vector<char> T;
+    for (size_t p = 0; p <= values.size(); p++) {
+        if (p < values.size() && values[p] != -128) {
+            T.push_back(values[p]);
+            continue;
+        }
+        if (p == values.size() && T.empty()) {
+            break;
+        }
+        int score = 0;
+        if (!T.empty()) {
+            smith_waterman(Q, T, 5, test_sigma, score, no_songs);
+        }
+        auto found = screen_scores.find(track);
+        int screen_score = (found == screen_scores.end()) ? -1 : found->second;
+        if ((score >= min_score) != (found != screen_scores.end()) || (score >= min_score && score != screen_score)) {
+            cout << "x-drop screen mismatch on track " << track << ": smith_waterman " << score << ", screen " << screen_score << endl;
+            ok = false;
+        }
+        T.clear();
+        track++;
+    }
+    cout << "x-drop screen check " << (ok ? "passed" : "FAILED") << " on " << track << " tracks" << endl;
+    return ok;
+}
+
 int main()
 {
     vector<char> values;
@@ -46,6 +85,12 @@ int main()
 
     //auto path = parallel_smith_waterman(test_1, values, 5, test_sigma, score);
 
+    //auto hits = motif_search(test_1, values, 1, map_stuff);
+
+    //screen_stats stats;
+    //auto screened = xdrop_screen(Q, values, 5, test_sigma, 15, 40, 4, stats, map_stuff);
+    //check_xdrop_screen(Q, values, 40);
+
     cout << "score" << endl;
 
     return 0;
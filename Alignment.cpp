@@ -3,6 +3,8 @@
 #include <algorithm>
 #include <omp.h>
 #include <ctime>
+#include <cstdint>
+#include <unordered_set>
 #include "Alignment.h"
 
 using namespace std;
@@ -291,4 +293,316 @@ vector<coord> parallel_smith_waterman(vector<char> Q, vector<char> T, int g, std
 	std::cout << "score: " << score << endl;
 
 	return path;
+}
+
+vector<motif_hit> motif_search(const vector<char>& Q, const vector<char>& T, int k, const std::map<interval, json_identifer>& find_song) {
+	//Myers' bit-vector algorithm: column j of the edit distance table between Q and any substring of T ending at j
+	//is held as two bit-vectors of vertical +1/-1 deltas, so each interval of T costs a handful of word operations
+	vector<motif_hit> hits;
+	int m = Q.size();
+	if (m == 0 || m > 64) {
+		std::cerr << "motif length must be between 1 and 64, got " << m << endl;
+		return hits;
+	}
+
+	//Peq[c] has bit i set when Q[i] == c, indexed by the raw byte of the interval
+	uint64_t Peq[256] = { 0 };
+	for (int i = 0; i < m; i++) {
+		Peq[(unsigned char)Q[i]] |= (uint64_t)1 << i;
+	}
+	const uint64_t all_ones = (m == 64) ? ~(uint64_t)0 : (((uint64_t)1 << m) - 1);
+	const uint64_t last_bit = (uint64_t)1 << (m - 1);
+
+	uint64_t Pv = all_ones;
+	uint64_t Mv = 0;
+	int edits = m;
+	int track = 0;
+	int best_edits = k + 1;
+	int best_end = -1;
+
+	auto start_time = std::time(0);
+
+	for (size_t j = 0; j < T.size(); j++) {
+		if (T[j] == -128) {//border between tracks, keep the best hit and restart so no occurrence spans two tracks
+			if (best_end >= 0) {
+				hits.push_back(motif_hit(track, best_end, best_edits));
+			}
+			Pv = all_ones;
+			Mv = 0;
+			edits = m;
+			best_edits = k + 1;
+			best_end = -1;
+			track++;
+			continue;
+		}
+
+		uint64_t Eq = Peq[(unsigned char)T[j]];
+		uint64_t Xv = Eq | Mv;
+		uint64_t Xh = (((Eq & Pv) + Pv) ^ Pv) | Eq;
+		uint64_t Ph = Mv | ~(Xh | Pv);
+		uint64_t Mh = Pv & Xh;
+		if (Ph & last_bit) {
+			edits++;
+		}
+		else if (Mh & last_bit) {
+			edits--;
+		}
+		//no carry in from row 0: the motif may start anywhere in T
+		Ph <<= 1;
+		Mh <<= 1;
+		Pv = Mh | ~(Xv | Ph);
+		Mv = Ph & Xv;
+
+		if (edits < best_edits) {
+			best_edits = edits;
+			best_end = j;
+		}
+	}
+	if (best_end >= 0) {
+		hits.push_back(motif_hit(track, best_end, best_edits));
+	}
+
+	std::cout << "time to completion motif search: " << std::time(0) - start_time << endl;
+
+	//the map is ordered by position in the database, so the n-th entry is the n-th track
+	vector<json_identifer> tracks;
+	for (auto& entry : find_song) {
+		tracks.push_back(entry.second);
+	}
+	for (auto& hit : hits) {
+		if (hit.track < tracks.size()) {
+			cout << "song is: " << std::get<0>(tracks[hit.track]) << " track " << std::get<1>(tracks[hit.track])
+				<< " edits: " << hit.edits << endl;
+		}
+	}
+
+	return hits;
+}
+
+//gapped X-drop extension from an anchor, walking A and B in direction step (+1 forward, -1 backward)
+//only cells within X of the best score so far stay alive; returns the best score and how far into B it was reached
+//prev and cur are scratch rows shared by every extension of the screen: only cells inside the live band are read,
+//and each of those is written earlier in the same extension, so they are never cleared
+//if reached is given, live cells with a non-negative score whose next column pairs equal intervals are appended to it
+static int xdrop_extend(const char* A, int nA, const char* B, int nB, int step, int g, std::function<int(char, char)>& sigma, int X, int& best_j, long long& cells, vector<int>& prev, vector<int>& cur, vector<std::pair<int, int>>* reached = nullptr) {
+	const int dead = std::numeric_limits<int>::lowest() / 2;
+	if ((int)prev.size() < nB + 1) {
+		prev.resize(nB + 1);
+		cur.resize(nB + 1);
+	}
+
+	int best = 0;
+	best_j = 0;
+
+	//row 0 is a run of gaps in A
+	int lo = 0;
+	int hi = 0;
+	prev[0] = 0;
+	cells++;
+	if (reached && nA > 0 && nB > 0 && A[0] == B[0]) {
+		reached->push_back(std::make_pair(0, 0));
+	}
+	while (hi < nB && -(hi + 1) * g >= -X) {
+		hi++;
+		prev[hi] = -hi * g;
+		cells++;
+	}
+
+	for (int i = 1; i <= nA; i++) {
+		int new_lo = -1;
+		int new_hi = -1;
+		for (int j = lo; j <= nB; j++) {
+			if (j > hi + 1 && (new_hi != j - 1 || cur[j - 1] - g < best - X)) {
+				break;//past the live band of the previous row and the gap run died
+			}
+			int top = (j <= hi) ? prev[j] - g : dead;
+			int top_left = (j > lo && j - 1 <= hi) ? prev[j - 1] + sigma(A[step * (i - 1)], B[step * (j - 1)]) : dead;
+			int left = (j > lo && new_hi == j - 1) ? cur[j - 1] - g : dead;
+			int val = max({ top, top_left, left });
+			cells++;
+			if (val < best - X) {
+				cur[j] = dead;
+				continue;
+			}
+			cur[j] = val;
+			if (new_lo < 0) {
+				new_lo = j;
+			}
+			new_hi = j;
+			if (val > best) {
+				best = val;
+				best_j = j;
+			}
+			if (reached && val >= 0 && i < nA && j < nB && A[step * i] == B[step * j]) {
+				reached->push_back(std::make_pair(i, j));
+			}
+		}
+		if (new_lo < 0) {//every cell dropped: nothing further can recover
+			break;
+		}
+		lo = new_lo;
+		hi = new_hi;
+		std::swap(prev, cur);
+	}
+	return best;
+}
+
+//plain two-row smith waterman score of Q against one track, used when seeding a track costs more than this would
+static int local_score(const char* Q, int m, const char* B, int n, int g, std::function<int(char, char)>& sigma, int& best_j, vector<int>& prev, vector<int>& cur) {
+	if ((int)prev.size() < n + 1) {
+		prev.resize(n + 1);
+		cur.resize(n + 1);
+	}
+	std::fill(prev.begin(), prev.begin() + n + 1, 0);
+	cur[0] = 0;
+
+	int best = 0;
+	best_j = 0;
+	for (int i = 1; i <= m; i++) {
+		for (int j = 1; j <= n; j++) {
+			cur[j] = max({ prev[j] - g, cur[j - 1] - g, prev[j - 1] + sigma(Q[i - 1], B[j - 1]), 0 });
+			if (cur[j] > best) {
+				best = cur[j];
+				best_j = j;
+			}
+		}
+		std::swap(prev, cur);
+	}
+	return best;
+}
+
+vector<screen_hit> xdrop_screen(const vector<char>& Q, const vector<char>& T, int g, std::function<int(char, char)> sigma, int X, int min_score, int seed_len, screen_stats& stats, const std::map<interval, json_identifer>& find_song) {
+	//seed-and-extend local alignment of Q against each track of T: exact seed_len matches are extended both ways
+	//with X-drop, and a track is abandoned once no extension can still reach min_score
+	vector<screen_hit> hits;
+	int m = Q.size();
+	if (m < seed_len || seed_len <= 0) {
+		std::cerr << "query must be at least seed_len (" << seed_len << ") intervals" << endl;
+		return hits;
+	}
+
+	//highest score a single aligned column can add, used to bound what a cell can still reach
+	int best_column = 0;
+	for (int i = 0; i < m; i++) {
+		best_column = max(best_column, sigma(Q[i], Q[i]));
+	}
+
+	//seed table: every seed_len window of the query and where it starts
+	std::map<vector<char>, vector<int>> seeds;
+	for (int i = 0; i + seed_len <= m; i++) {
+		seeds[vector<char>(Q.begin() + i, Q.begin() + i + seed_len)].push_back(i);
+	}
+
+	auto start_time = std::time(0);
+
+	vector<int> prev_row;
+	vector<int> cur_row;
+	int track = 0;
+	size_t track_start = 0;
+	for (size_t p = 0; p <= T.size(); p++) {
+		if (p < T.size() && T[p] != -128) {
+			continue;
+		}
+		int n = p - track_start;
+		if (p == T.size() && n == 0) {//T ends with a separator
+			break;
+		}
+		const char* B = T.data() + track_start;
+		stats.tracks++;
+		stats.cells_full += (long long)m * n;
+
+		int best = 0;
+		int best_end = -1;
+		if ((long long)best_column * min(m, n) >= min_score) {//otherwise even a perfect alignment falls short
+			//a seed is skipped only if an earlier forward extension reached its first cell with a score of at least 0:
+			//that extension could follow any alignment starting at the seed, so it already scored at least as much
+			//(exact with X unlimited). a seed merely lying on an extended diagonal is not enough, since the
+			//extension may have carried a negative stretch up to it
+			std::unordered_set<long long> passed;
+			vector<std::pair<int, int>> reached;
+			long long track_cells = 0;
+			bool full_dp = false;
+			vector<char> window(seed_len);
+			for (int j = 0; j + seed_len <= n && !full_dp; j++) {
+				window.assign(B + j, B + j + seed_len);
+				track_cells++;//seed lookup
+				auto found = seeds.find(window);
+				if (found == seeds.end()) {
+					continue;
+				}
+				for (int qi : found->second) {
+					if (track_cells >= (long long)m * n) {//repetitive track: seeding already costs more than the full table
+						full_dp = true;
+						break;
+					}
+					if (passed.count((long long)qi * (n + 1) + j)) {
+						continue;
+					}
+					int seed_score = 0;
+					for (int s = 0; s < seed_len; s++) {
+						seed_score += sigma(Q[qi + s], B[j + s]);
+					}
+					track_cells += seed_len;
+
+					int back_j = 0;
+					int left_score = 0;
+					if (qi > 0 && j > 0) {
+						left_score = xdrop_extend(Q.data() + qi - 1, qi, B + j - 1, j, -1, g, sigma, X, back_j, track_cells, prev_row, cur_row);
+					}
+
+					int tail = min(m - qi - seed_len, n - j - seed_len);
+					int fwd_j = 0;
+					int right_score = 0;
+					if (left_score + seed_score + (long long)best_column * tail >= min_score) {
+						reached.clear();
+						right_score = xdrop_extend(Q.data() + qi + seed_len, m - qi - seed_len, B + j + seed_len, n - j - seed_len, 1, g, sigma, X, fwd_j, track_cells, prev_row, cur_row, &reached);
+						for (auto& cell : reached) {
+							passed.insert((long long)(qi + seed_len + cell.first) * (n + 1) + j + seed_len + cell.second);
+						}
+					}
+
+					int total = left_score + seed_score + right_score;
+					if (total > best) {
+						best = total;
+						best_end = track_start + j + seed_len + fwd_j - 1;
+					}
+				}
+			}
+
+			if (full_dp) {
+				int end_j = 0;
+				best = local_score(Q.data(), m, B, n, g, sigma, end_j, prev_row, cur_row);
+				best_end = track_start + end_j - 1;
+				track_cells += (long long)m * n;
+			}
+			stats.cells_computed += track_cells;
+		}
+
+		if (best >= min_score) {
+			hits.push_back(screen_hit(track, best_end, best));
+		}
+		else {
+			stats.tracks_abandoned++;
+		}
+		track++;
+		track_start = p + 1;
+	}
+
+	std::cout << "time to completion x-drop screen: " << std::time(0) - start_time << endl;
+	std::cout << "cells computed: " << stats.cells_computed << " of " << stats.cells_full
+		<< " (pruning rate " << stats.pruning_rate() << "), tracks abandoned: " << stats.tracks_abandoned
+		<< " of " << stats.tracks << endl;
+
+	vector<json_identifer> tracks;
+	for (auto& entry : find_song) {
+		tracks.push_back(entry.second);
+	}
+	for (auto& hit : hits) {
+		if (hit.track < tracks.size()) {
+			cout << "song is: " << std::get<0>(tracks[hit.track]) << " track " << std::get<1>(tracks[hit.track])
+				<< " score: " << hit.score << endl;
+		}
+	}
+
+	return hits;
 }
\ No newline at end of file
@@ -14,6 +14,33 @@ struct coord {
 	coord(int xc, int yc): x(xc), y(yc) {}
 };
 
+//best occurrence of a motif inside one track of the concatenated database
+struct motif_hit {
+	int track;//ordinal of the track, counted by -128 separators
+	int end;//index in T of the last interval of the occurrence
+	int edits;
+	motif_hit(int t, int e, int k): track(t), end(e), edits(k) {}
+};
+
+//best local alignment found for one track by the x-drop screen
+struct screen_hit {
+	int track;//ordinal of the track, counted by -128 separators
+	int end;//index in T where the alignment ends
+	int score;
+	screen_hit(int t, int e, int s): track(t), end(e), score(s) {}
+};
+
+//how much of the full Smith-Waterman work the x-drop screen skipped
+struct screen_stats {
+	long long cells_computed = 0;
+	long long cells_full = 0;//what smith_waterman would fill, |Q| * |track| summed over tracks
+	int tracks = 0;
+	int tracks_abandoned = 0;//no extension reached min_score
+	double pruning_rate() const {
+		return cells_full > 0 ? 1.0 - (double)cells_computed / cells_full : 0.0;
+	}
+};
+
 //placeholder alphabet size 12
 enum alphabet {
 	a, b, c, d, e, f, g, h, i, j, k, l
@@ -28,6 +55,12 @@ int smith_waterman_linear(vector<char> Q, vector<char> T, int g, std::function<i
 
 vector<coord> parallel_smith_waterman(vector<char> Q, vector<char> T, int g, std::function<int(char, char)> sigma, int& score);
 
+//bit-parallel (Myers) approximate search for a short motif (up to 64 intervals) with at most k edits, one hit per track
+vector<motif_hit> motif_search(const vector<char>& Q, const vector<char>& T, int k, const std::map<interval, json_identifer>& find_song);
+
+//seed-and-extend local alignment with x-drop termination, reports tracks whose best alignment scores at least min_score
+vector<screen_hit> xdrop_screen(const vector<char>& Q, const vector<char>& T, int g, std::function<int(char, char)> sigma, int X, int min_score, int seed_len, screen_stats& stats, const std::map<interval, json_identifer>& find_song);
+
 /*
 vector<coord> global_hirschberg(vector<alphabet> Q, vector<alphabet> T, int g, std::function<int(alphabet, alphabet)> sigma, int& score);
 